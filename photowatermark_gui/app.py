@@ -1,14 +1,17 @@
 """Main window for PhotoWatermarkGUI."""
 from __future__ import annotations
 
+import copy
+import os
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterator, List, Optional
 
-from PIL import Image
-
-from PyQt6.QtCore import QPointF, Qt
+from PyQt6.QtCore import QPointF, QThreadPool, QTimer, Qt
 from PyQt6.QtGui import QAction, QColor, QFont
 from PyQt6.QtWidgets import (
+    QApplication,
     QButtonGroup,
     QCheckBox,
     QComboBox,
@@ -24,6 +27,7 @@ from PyQt6.QtWidgets import (
     QListWidgetItem,
     QMainWindow,
     QMessageBox,
+    QProgressDialog,
     QPushButton,
     QRadioButton,
     QFontComboBox,
@@ -38,17 +42,27 @@ from PyQt6.QtWidgets import (
 )
 
 from .models import ExportSettings, WatermarkSettings
-from .services import image_loader
+from .services import image_cache, image_loader
+from .services.export import ExportSignals, ExportTask, export_image
 from .services.templates import TemplateManager
-from .services.watermark import (
-    ALLOWED_INPUT_SUFFIXES,
-    compose_watermark,
-    compute_output_path,
-    scale_image,
-)
+from .services.watermark import ALLOWED_INPUT_SUFFIXES, render_watermark_layer
 from .widgets.image_list import ImageListWidget
 from .widgets.preview import ImagePreview
 
+OUTPUT_FORMATS = ("auto", "jpeg", "png")
+SCALE_MODES = ("none", "width", "height", "percent")
+
+
+@contextmanager
+def _block(*widgets: QWidget) -> Iterator[None]:
+    """Suppress signals from ``widgets`` while programmatically updating them."""
+    previous = [widget.blockSignals(True) for widget in widgets]
+    try:
+        yield
+    finally:
+        for widget, was_blocked in zip(widgets, previous):
+            widget.blockSignals(was_blocked)
+
 
 class MainWindow(QMainWindow):
     """Main application window."""
@@ -63,8 +77,34 @@ class MainWindow(QMainWindow):
         self.export_settings = ExportSettings()
 
         self.images: List[Path] = []
+        self._image_set: set[Path] = set()
         self.current_image: Optional[Path] = None
 
+        self._export_signals = ExportSignals(self)
+        self._export_signals.finished.connect(self._on_export_finished)
+        self._export_signals.error.connect(self._on_export_error)
+        self._export_signals.cancelled.connect(self._on_export_cancelled)
+        self._export_cancel = threading.Event()
+        self._export_progress: Optional[QProgressDialog] = None
+        self._export_total = 0
+        self._export_done = 0
+        self._export_cancelled = 0
+        self._export_errors: List[str] = []
+        self._export_pool = QThreadPool(self)
+
+        self._scan_signals = image_loader.FolderScanSignals(self)
+        self._scan_signals.finished.connect(self._on_folder_scanned)
+        self._scan_signals.error.connect(self._on_folder_scan_failed)
+
+        self._preview_loader = image_loader.PreviewLoader(self)
+        self._preview_loader.loaded.connect(self._on_preview_loaded)
+        self._prefetch_timer = QTimer(self)
+        self._prefetch_timer.setSingleShot(True)
+        self._prefetch_timer.setInterval(150)
+        self._prefetch_timer.timeout.connect(self._prefetch_neighbours)
+
+        QThreadPool.globalInstance().start(image_loader.prune_thumbnail_cache)
+
         self._init_ui()
         self._restore_last_session()
         self._refresh_template_list()
@@ -120,8 +160,10 @@ class MainWindow(QMainWindow):
         controls_layout.addWidget(self._build_import_group())
         controls_layout.addWidget(self._build_watermark_group())
         controls_layout.addWidget(self._build_position_group())
-        controls_layout.addWidget(self._build_export_group())
         controls_layout.addStretch()
+        self._controls_layout = controls_layout
+        # The export group is the largest; build it once the window is up.
+        QTimer.singleShot(0, self._attach_export_group)
 
         self.save_template_btn.clicked.connect(self._save_template)
         self.rename_template_btn.clicked.connect(self._rename_template)
@@ -336,12 +378,21 @@ class MainWindow(QMainWindow):
         for index, (label, ratio) in enumerate(positions):
             button = QPushButton(label)
             row, col = divmod(index, 3)
-            button.clicked.connect(lambda checked, r=ratio: self._apply_position(r))
+            button.setProperty("pos_ratio", ratio)
+            button.clicked.connect(self._apply_sender_position)
             grid.addWidget(button, row, col)
         layout.addLayout(grid)
         layout.addWidget(QLabel("提示：可在预览图中拖拽水印到任意位置。"))
         return group
 
+    def _attach_export_group(self) -> None:
+        if hasattr(self, "format_combo"):
+            return
+        layout = self._controls_layout
+        layout.insertWidget(layout.count() - 1, self._build_export_group())
+        self._apply_export_settings_to_ui()
+        self._update_export_buttons()
+
     def _build_export_group(self) -> QWidget:
         group = QGroupBox("导出设置")
         form = QFormLayout(group)
@@ -362,6 +413,9 @@ class MainWindow(QMainWindow):
         self.naming_original = QRadioButton("原名")
         self.naming_prefix = QRadioButton("前缀")
         self.naming_suffix = QRadioButton("后缀")
+        self.naming_original.setProperty("mode", "original")
+        self.naming_prefix.setProperty("mode", "prefix")
+        self.naming_suffix.setProperty("mode", "suffix")
         for button in (self.naming_original, self.naming_prefix, self.naming_suffix):
             self.naming_group.addButton(button)
             naming_layout.addWidget(button)
@@ -430,10 +484,18 @@ class MainWindow(QMainWindow):
         folder = QFileDialog.getExistingDirectory(self, "选择图片文件夹")
         if not folder:
             return
-        folder_path = Path(folder)
-        files = [p for p in folder_path.iterdir() if p.suffix.lower() in ALLOWED_INPUT_SUFFIXES]
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        task = image_loader.FolderScanTask(Path(folder), self._scan_signals)
+        QThreadPool.globalInstance().start(task)
+
+    def _on_folder_scanned(self, folder: Path, files: List[Path]) -> None:
+        QApplication.restoreOverrideCursor()
         self._add_images(files)
 
+    def _on_folder_scan_failed(self, folder: Path, message: str) -> None:
+        QApplication.restoreOverrideCursor()
+        QMessageBox.warning(self, "错误", f"无法读取文件夹：{folder}\n{message}")
+
     def _add_images(self, paths: List[Path]) -> None:
         candidates = image_loader.filter_supported_images(paths)
         if not candidates:
@@ -441,20 +503,19 @@ class MainWindow(QMainWindow):
             return
         new_paths: List[Path] = []
         duplicates: List[Path] = []
-        existing = set(self.images)
         for path in candidates:
-            if path in existing:
+            if path in self._image_set:
                 duplicates.append(path)
             else:
                 new_paths.append(path)
-                existing.add(path)
+                self._image_set.add(path)
 
         if not new_paths:
             QMessageBox.information(self, "提示", "这些图片已在列表中，无需重复导入。")
             return
 
         self.images.extend(new_paths)
-        self.image_list.populate(self.images, selected=self.current_image)
+        self.image_list.append(new_paths)
         if not self.current_image and self.images:
             self.image_list.setCurrentRow(0)
 
@@ -465,13 +526,14 @@ class MainWindow(QMainWindow):
         self._update_export_buttons()
 
     def _remove_images(self, paths: List[Path]) -> None:
-        to_remove = [p for p in paths if p in self.images]
-        if not to_remove:
+        remove_set = set(paths) & self._image_set
+        if not remove_set:
             return
-        for path in to_remove:
-            self.images.remove(path)
-            if self.current_image == path:
-                self.current_image = None
+        self.images = [p for p in self.images if p not in remove_set]
+        self._image_set -= remove_set
+        image_cache.discard(remove_set)
+        if self.current_image in remove_set:
+            self.current_image = None
 
         if not self.images:
             self.image_list.clear()
@@ -480,22 +542,23 @@ class MainWindow(QMainWindow):
             self._update_export_buttons()
             return
 
-        next_selection = self.current_image if self.current_image in self.images else self.images[0]
+        next_selection = self.current_image if self.current_image in self._image_set else self.images[0]
         self.image_list.populate(self.images, selected=next_selection)
-        if next_selection in self.images:
+        if next_selection in self._image_set:
             index = self.images.index(next_selection)
             self.image_list.setCurrentRow(index)
             self.current_image = next_selection
         else:
             self.current_image = None
-        QMessageBox.information(self, "完成", f"已删除 {len(to_remove)} 张图片。")
+        QMessageBox.information(self, "完成", f"已删除 {len(remove_set)} 张图片。")
         self._update_export_buttons()
 
     def _update_export_buttons(self) -> None:
         has_images = bool(self.images)
         self.batch_export_button.setEnabled(has_images)
         self.export_toolbar_button.setEnabled(has_images)
-        self.export_current_button.setEnabled(has_images and self.current_image is not None)
+        if hasattr(self, "export_current_button"):
+            self.export_current_button.setEnabled(has_images and self.current_image is not None)
 
     def _handle_list_selection(self) -> None:
         items = self.image_list.selectedItems()
@@ -507,13 +570,26 @@ class MainWindow(QMainWindow):
         item: QListWidgetItem = items[0]
         path: Path = item.data(Qt.ItemDataRole.UserRole)
         self.current_image = path
-        image = image_loader.load_qimage(path)
+        self._update_export_buttons()
+        self._preview_loader.load(path)
+        self._prefetch_timer.start()
+
+    def _prefetch_neighbours(self) -> None:
+        items = self.image_list.selectedItems()
+        if not items:
+            return
+        row = self.image_list.row(items[0])
+        neighbours = (self.image_list.item(i) for i in (row - 1, row + 1) if 0 <= i < self.image_list.count())
+        self._preview_loader.prefetch(item.data(Qt.ItemDataRole.UserRole) for item in neighbours)
+
+    def _on_preview_loaded(self, path: Path, image, source_size) -> None:
+        if path != self.current_image:
+            return
         if image.isNull():
             QMessageBox.warning(self, "错误", f"无法加载图片：{path}")
             return
-        self.preview.set_image(image)
+        self.preview.set_image(image, source_size)
         self.preview.apply_settings(self.watermark_settings)
-        self._update_export_buttons()
 
     def _on_text_changed(self) -> None:
         self.watermark_settings.text = self.text_edit.toPlainText()
@@ -697,6 +773,9 @@ class MainWindow(QMainWindow):
             return False
         return True
 
+    def _apply_sender_position(self) -> None:
+        self._apply_position(self.sender().property("pos_ratio"))
+
     def _apply_position(self, ratio: QPointF) -> None:
         self.watermark_settings.position_ratio = ratio
         self.preview.apply_settings(self.watermark_settings)
@@ -712,19 +791,18 @@ class MainWindow(QMainWindow):
         self.export_settings.output_dir = path
         self.output_dir_edit.setText(str(path))
 
+    def _checked_naming_mode(self) -> str:
+        button = self.naming_group.checkedButton()
+        return button.property("mode") if button else "original"
+
     def _update_naming_mode(self) -> None:
-        if self.naming_original.isChecked():
-            self.export_settings.naming_mode = "original"
-        elif self.naming_prefix.isChecked():
-            self.export_settings.naming_mode = "prefix"
-        else:
-            self.export_settings.naming_mode = "suffix"
+        self.export_settings.naming_mode = self._checked_naming_mode()
         self.prefix_edit.setEnabled(self.export_settings.naming_mode == "prefix")
         self.suffix_edit.setEnabled(self.export_settings.naming_mode == "suffix")
 
     def _update_output_format(self) -> None:
         index = self.format_combo.currentIndex()
-        self.export_settings.output_format = ["auto", "jpeg", "png"][index]
+        self.export_settings.output_format = OUTPUT_FORMATS[index]
         self._update_quality_controls()
 
     def _on_jpeg_quality_changed(self, value: int) -> None:
@@ -748,7 +826,7 @@ class MainWindow(QMainWindow):
         self.jpeg_quality_label.setText(str(self.jpeg_quality_slider.value()))
 
     def _on_scale_mode_changed(self, index: int) -> None:
-        mode = ["none", "width", "height", "percent"][index]
+        mode = SCALE_MODES[index]
         self.export_settings.scale_mode = mode
         self._refresh_scale_value_constraints()
 
@@ -760,9 +838,9 @@ class MainWindow(QMainWindow):
     def _update_scale_controls(self) -> None:
         if not hasattr(self, "scale_mode_combo"):
             return
-        mode_index = {"none": 0, "width": 1, "height": 2, "percent": 3}
+        mode = self.export_settings.scale_mode
         self.scale_mode_combo.blockSignals(True)
-        self.scale_mode_combo.setCurrentIndex(mode_index.get(self.export_settings.scale_mode, 0))
+        self.scale_mode_combo.setCurrentIndex(SCALE_MODES.index(mode) if mode in SCALE_MODES else 0)
         self.scale_mode_combo.blockSignals(False)
         self._refresh_scale_value_constraints()
 
@@ -806,17 +884,23 @@ class MainWindow(QMainWindow):
         self.watermark_settings.position_ratio = ratio
 
     def _refresh_template_list(self) -> None:
-        current = self.template_combo.currentText()
-        self.template_combo.blockSignals(True)
-        self.template_combo.clear()
-        self.template_combo.addItem("")
-        for name in self.template_manager.list_templates():
-            self.template_combo.addItem(name)
-        if current:
-            idx = self.template_combo.findText(current)
-            if idx >= 0:
-                self.template_combo.setCurrentIndex(idx)
-        self.template_combo.blockSignals(False)
+        combo = self.template_combo
+        current = combo.currentText()
+        target = [""] + self.template_manager.list_templates()
+        target_set = set(target)
+        combo.blockSignals(True)
+        for index in range(combo.count() - 1, -1, -1):
+            if combo.itemText(index) not in target_set:
+                combo.removeItem(index)
+        # Surviving entries keep their sorted order, so inserting each missing
+        # name at its target index rebuilds the list without touching the rest.
+        existing = {combo.itemText(i) for i in range(combo.count())}
+        for index, name in enumerate(target):
+            if name not in existing:
+                combo.insertItem(index, name)
+        if current not in target_set:
+            combo.setCurrentIndex(0)
+        combo.blockSignals(False)
 
     def _save_template(self) -> None:
         name, ok = QInputDialog.getText(self, "保存模板", "模板名称：")
@@ -864,23 +948,17 @@ class MainWindow(QMainWindow):
         self._apply_settings_to_ui()
         self._update_export_buttons()
         if self.current_image:
-            image = image_loader.load_qimage(self.current_image)
-            if not image.isNull():
-                self.preview.set_image(image)
-                self.preview.apply_settings(self.watermark_settings)
+            self._preview_loader.load(self.current_image)
 
     def _sync_export_fields(self) -> None:
+        if not hasattr(self, "format_combo"):
+            return
         self.export_settings.prefix = self.prefix_edit.text()
         self.export_settings.suffix = self.suffix_edit.text()
-        if self.naming_original.isChecked():
-            self.export_settings.naming_mode = "original"
-        elif self.naming_prefix.isChecked():
-            self.export_settings.naming_mode = "prefix"
-        else:
-            self.export_settings.naming_mode = "suffix"
-        self.export_settings.output_format = ["auto", "jpeg", "png"][self.format_combo.currentIndex()]
+        self.export_settings.naming_mode = self._checked_naming_mode()
+        self.export_settings.output_format = OUTPUT_FORMATS[self.format_combo.currentIndex()]
         self.export_settings.jpeg_quality = self.jpeg_quality_slider.value()
-        mode = ["none", "width", "height", "percent"][self.scale_mode_combo.currentIndex()]
+        mode = SCALE_MODES[self.scale_mode_combo.currentIndex()]
         self.export_settings.scale_mode = mode
         if mode != "none":
             self.export_settings.scale_value = self.scale_value_spin.value()
@@ -901,7 +979,8 @@ class MainWindow(QMainWindow):
 
         self._sync_export_fields()
         try:
-            self._export_single(self.current_image)
+            self.export_settings.output_dir.mkdir(parents=True, exist_ok=True)
+            export_image(self.current_image, self.watermark_settings, self.export_settings)
         except Exception as exc:  # noqa: BLE001
             print(exc)
             QMessageBox.warning(self, "失败", f"导出失败：{exc}")
@@ -923,41 +1002,84 @@ class MainWindow(QMainWindow):
         if not self._ensure_watermark_ready():
             return
 
+        if self._export_progress is not None:
+            return
+
         self._sync_export_fields()
-        errors: List[str] = []
+        watermark = copy.deepcopy(self.watermark_settings)
+        export = copy.deepcopy(self.export_settings)
+        try:
+            export.output_dir.mkdir(parents=True, exist_ok=True)
+            # Rendered once on the GUI thread and shared by every task.
+            layer = render_watermark_layer(watermark)
+        except Exception as exc:  # noqa: BLE001
+            QMessageBox.warning(self, "失败", f"导出失败：{exc}")
+            return
+        self._export_cancel = threading.Event()
+        self._export_total = len(self.images)
+        self._export_done = 0
+        self._export_cancelled = 0
+        self._export_errors = []
+
+        progress = QProgressDialog("正在导出图片…", "取消", 0, self._export_total, self)
+        progress.setWindowTitle("批量导出")
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(0)
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
+        progress.canceled.connect(self._export_cancel.set)
+        progress.setValue(0)
+        self._export_progress = progress
+
+        self._export_pool.setMaxThreadCount(min(len(self.images), os.cpu_count() or 4))
         for path in self.images:
-            try:
-                self._export_single(path)
-            except Exception as exc:  # noqa: BLE001
-                errors.append(f"{path.name}: {exc}")
+            self._export_pool.start(ExportTask(path, watermark, export, layer, self._export_signals, self._export_cancel))
+
+    def _on_export_finished(self, path: Path, target: str) -> None:
+        self._advance_export()
+
+    def _on_export_error(self, path: Path, message: str) -> None:
+        self._export_errors.append(f"{path.name}: {message}")
+        self._advance_export()
+
+    def _on_export_cancelled(self, path: Path) -> None:
+        self._export_cancelled += 1
+        self._advance_export()
+
+    def _advance_export(self) -> None:
+        self._export_done += 1
+        progress = self._export_progress
+        if progress is None:
+            return
+        if self._export_done < self._export_total:
+            # setValue() pumps events for modal dialogs, so it must come last.
+            progress.setValue(self._export_done)
+            return
+        self._export_progress = None
+        progress.close()
+
+        errors = self._export_errors
         if errors:
             text = "\n".join(errors[:10]) + ("\n…" if len(errors) > 10 else "")
             QMessageBox.warning(self, "部分失败", text)
+        elif self._export_cancelled:
+            exported = self._export_total - self._export_cancelled
+            QMessageBox.information(self, "已取消", f"导出已取消，已完成 {exported} 张图片。")
         else:
             QMessageBox.information(self, "成功", "导出完成！")
 
-    def _export_single(self, path: Path) -> None:
-        image = Image.open(path)
-        scaled = scale_image(image, self.export_settings)
-        composed = compose_watermark(scaled, self.watermark_settings)
-        output_dir = self.export_settings.output_dir or path.parent
-        output_dir.mkdir(parents=True, exist_ok=True)
-        target = compute_output_path(path, self.export_settings, output_dir)
-        if target.suffix.lower() in {".jpg", ".jpeg"}:
-            composed = composed.convert("RGB")
-            composed.save(target, quality=self.export_settings.jpeg_quality)
-        else:
-            composed.save(target)
-
     def _restore_last_session(self) -> None:
         data = self.template_manager.load_last_session()
         if not data:
             return
         self.watermark_settings = WatermarkSettings.from_dict(data.get("watermark"))
         self.export_settings = ExportSettings.from_dict(data.get("export"))
-        image_paths = [Path(p) for p in data.get("images", []) if Path(p).exists()]
+        # Dedupe so the list and its set mirror stay in step.
+        image_paths = list(dict.fromkeys(Path(p) for p in data.get("images", [])))
+        image_paths = [p for p in image_paths if p.exists()]
         if image_paths:
             self.images = image_paths
+            self._image_set = set(image_paths)
             self.image_list.populate(self.images)
             self.image_list.setCurrentRow(0)
             self.current_image = self.images[0]
@@ -965,65 +1087,50 @@ class MainWindow(QMainWindow):
         self._update_export_buttons()
 
     def _apply_settings_to_ui(self) -> None:
-        self.text_edit.blockSignals(True)
-        self.text_edit.setPlainText(self.watermark_settings.text)
-        self.text_edit.blockSignals(False)
-
-        self.opacity_slider.blockSignals(True)
-        self.opacity_spin.blockSignals(True)
-        self.opacity_slider.setValue(self.watermark_settings.opacity)
-        self.opacity_spin.setValue(self.watermark_settings.opacity)
-        self.opacity_slider.blockSignals(False)
-        self.opacity_spin.blockSignals(False)
-
-        self.font_size_spin.blockSignals(True)
-        self.font_size_spin.setValue(self.watermark_settings.font_size)
-        self.font_size_spin.blockSignals(False)
-
-        self.font_combo.blockSignals(True)
-        self.font_combo.setCurrentFont(QFont(self.watermark_settings.font_family or "Arial"))
-        self.font_combo.blockSignals(False)
-
-        self.bold_check.blockSignals(True)
-        self.bold_check.setChecked(self.watermark_settings.bold)
-        self.bold_check.blockSignals(False)
-
-        self.italic_check.blockSignals(True)
-        self.italic_check.setChecked(self.watermark_settings.italic)
-        self.italic_check.blockSignals(False)
-
-        self.shadow_check.blockSignals(True)
-        self.shadow_check.setChecked(self.watermark_settings.shadow)
-        self.shadow_check.blockSignals(False)
-
-        self.outline_check.blockSignals(True)
-        self.outline_check.setChecked(self.watermark_settings.outline)
-        self.outline_check.blockSignals(False)
+        settings = self.watermark_settings
+        with _block(
+            self.text_edit,
+            self.opacity_slider,
+            self.opacity_spin,
+            self.font_size_spin,
+            self.font_combo,
+            self.bold_check,
+            self.italic_check,
+            self.shadow_check,
+            self.outline_check,
+        ):
+            self.text_edit.setPlainText(settings.text)
+            self.opacity_slider.setValue(settings.opacity)
+            self.opacity_spin.setValue(settings.opacity)
+            self.font_size_spin.setValue(settings.font_size)
+            self.font_combo.setCurrentFont(QFont(settings.font_family or "Arial"))
+            self.bold_check.setChecked(settings.bold)
+            self.italic_check.setChecked(settings.italic)
+            self.shadow_check.setChecked(settings.shadow)
+            self.outline_check.setChecked(settings.outline)
 
         self._update_color_button()
 
         if hasattr(self, "rotation_spin"):
-            self.rotation_spin.blockSignals(True)
-            self.rotation_spin.setValue(self.watermark_settings.rotation)
-            self.rotation_spin.blockSignals(False)
-        if hasattr(self, "rotation_slider"):
-            slider_value = int(round(self.watermark_settings.rotation * 10))
-            self.rotation_slider.blockSignals(True)
-            self.rotation_slider.setValue(slider_value)
-            self.rotation_slider.blockSignals(False)
+            with _block(self.rotation_spin, self.rotation_slider):
+                self.rotation_spin.setValue(settings.rotation)
+                self.rotation_slider.setValue(int(round(settings.rotation * 10)))
 
         if hasattr(self, "mode_text_radio"):
-            self.mode_text_radio.blockSignals(True)
-            self.mode_image_radio.blockSignals(True)
-            is_image_mode = self.watermark_settings.mode == "image"
-            self.mode_text_radio.setChecked(not is_image_mode)
-            self.mode_image_radio.setChecked(is_image_mode)
-            self.mode_text_radio.blockSignals(False)
-            self.mode_image_radio.blockSignals(False)
+            is_image_mode = settings.mode == "image"
+            with _block(self.mode_text_radio, self.mode_image_radio):
+                self.mode_text_radio.setChecked(not is_image_mode)
+                self.mode_image_radio.setChecked(is_image_mode)
             self._update_mode_visibility()
 
         self._sync_image_controls()
+        self._apply_export_settings_to_ui()
+        self._update_export_buttons()
+        self.preview.apply_settings(self.watermark_settings)
 
+    def _apply_export_settings_to_ui(self) -> None:
+        if not hasattr(self, "format_combo"):
+            return
         if self.export_settings.output_dir:
             self.output_dir_edit.setText(str(self.export_settings.output_dir))
         else:
@@ -1033,25 +1140,28 @@ class MainWindow(QMainWindow):
         self.suffix_edit.setText(self.export_settings.suffix)
 
         mode = self.export_settings.naming_mode
-        self.naming_original.setChecked(mode == "original")
-        self.naming_prefix.setChecked(mode == "prefix")
-        self.naming_suffix.setChecked(mode == "suffix")
+        output_format = self.export_settings.output_format
+        index = OUTPUT_FORMATS.index(output_format) if output_format in OUTPUT_FORMATS else 0
+        with _block(self.naming_original, self.naming_prefix, self.naming_suffix, self.format_combo):
+            self.naming_original.setChecked(mode == "original")
+            self.naming_prefix.setChecked(mode == "prefix")
+            self.naming_suffix.setChecked(mode == "suffix")
+            self.format_combo.setCurrentIndex(index)
         self.prefix_edit.setEnabled(mode == "prefix")
         self.suffix_edit.setEnabled(mode == "suffix")
-
-        index = {"auto": 0, "jpeg": 1, "png": 2}.get(self.export_settings.output_format, 0)
-        self.format_combo.setCurrentIndex(index)
         self._set_jpeg_quality(self.export_settings.jpeg_quality)
         self._update_quality_controls()
         self._update_scale_controls()
-        self._update_export_buttons()
-        self.preview.apply_settings(self.watermark_settings)
 
     def closeEvent(self, event) -> None:
+        self._export_cancel.set()
+        self._export_pool.waitForDone()
+        # Queued thumbnails are no longer needed; only wait for running ones.
+        QThreadPool.globalInstance().clear()
+        QThreadPool.globalInstance().waitForDone()
         data = {
             "watermark": self.watermark_settings.to_dict(),
             "export": self.export_settings.to_dict(),
-            "images": [str(p) for p in self.images],
         }
-        self.template_manager.save_last_session(data)
+        self.template_manager.save_last_session(data, self.images)
         super().closeEvent(event)
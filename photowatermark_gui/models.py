@@ -1,14 +1,18 @@
 """Data models for PhotoWatermarkGUI."""
 from __future__ import annotations
 
+import sys
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, Optional
 
 from PyQt6.QtCore import QPointF
 
+# slots=True needs Python 3.10; older interpreters keep a per-instance __dict__.
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+
+@dataclass(**_SLOTS)
 class WatermarkSettings:
     """Watermark configuration parameters."""
 
@@ -74,7 +78,7 @@ class WatermarkSettings:
         )
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class ExportSettings:
     """Batch export options."""
 
@@ -0,0 +1,136 @@
+"""Background export tasks."""
+from __future__ import annotations
+
+import io
+import shutil
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+
+from PIL import Image
+
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+
+from ..models import ExportSettings, WatermarkSettings
+from .watermark import (
+    JPEG_SUFFIXES,
+    WatermarkLayer,
+    compose_with_layer,
+    compute_output_path,
+    render_watermark_layer,
+    scale_image,
+    target_size,
+)
+
+# zlib level 1 encodes several times faster than Pillow's default of 6 at the
+# cost of somewhat larger files.
+PNG_COMPRESS_LEVEL = 1
+
+
+def _save_image(image: Image.Image, target: Path, export: ExportSettings) -> None:
+    # Encode fully in memory first so a failed encode never leaves a truncated
+    # file behind, then write the result in one call.
+    buffer = io.BytesIO()
+    if target.suffix.lower() in JPEG_SUFFIXES:
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        image.save(
+            buffer,
+            format="JPEG",
+            quality=export.jpeg_quality,
+            optimize=False,
+            progressive=False,
+            subsampling=2,
+        )
+    else:
+        image.save(buffer, format="PNG", compress_level=PNG_COMPRESS_LEVEL)
+    target.write_bytes(buffer.getvalue())
+
+
+def _open_source(path: Path, export: ExportSettings) -> Tuple[Image.Image, Tuple[int, int]]:
+    """Decode ``path``, letting libjpeg skip detail the export will discard.
+
+    Returns the image and its original size.
+    """
+    with Image.open(path) as image:
+        original_size = image.size
+        if export.scale_mode != "none" and image.format == "JPEG":
+            width, height = target_size(original_size, export)
+            if 0 < width < original_size[0] and 0 < height < original_size[1]:
+                image.draft("RGB", (width, height))
+        image.load()
+    return image, original_size
+
+
+def _is_passthrough(path: Path, target: Path, watermark: WatermarkSettings, export: ExportSettings) -> bool:
+    """True when exporting ``path`` would reproduce it unchanged."""
+    draws_nothing = watermark.opacity <= 0 or (watermark.mode != "image" and not watermark.text.strip())
+    return (
+        draws_nothing
+        and export.scale_mode == "none"
+        and export.output_format in ("auto", "png")
+        and target.suffix == path.suffix.lower()
+    )
+
+
+def export_image(
+    path: Path,
+    watermark: WatermarkSettings,
+    export: ExportSettings,
+    layer: Optional[WatermarkLayer] = None,
+) -> Path:
+    """Export one image; the output directory must already exist."""
+    output_dir = export.output_dir or path.parent
+    target = compute_output_path(path, export, output_dir)
+    if _is_passthrough(path, target, watermark, export):
+        if not (target.exists() and target.samefile(path)):
+            shutil.copyfile(path, target)
+        return target
+    if layer is None:
+        layer = render_watermark_layer(watermark)
+    image, original_size = _open_source(path, export)
+    scaled = scale_image(image, export, original_size)
+    # ``scaled`` is private to this call, so blend into it directly.
+    composed = compose_with_layer(scaled, layer, watermark.position_ratio, inplace=True)
+    _save_image(composed, target, export)
+    return target
+
+
+class ExportSignals(QObject):
+    """Delivers per-image export results back to the GUI thread."""
+
+    finished = pyqtSignal(Path, str)
+    error = pyqtSignal(Path, str)
+    cancelled = pyqtSignal(Path)
+
+
+class ExportTask(QRunnable):
+    """Exports a single image on a worker thread."""
+
+    def __init__(
+        self,
+        path: Path,
+        watermark: WatermarkSettings,
+        export: ExportSettings,
+        layer: WatermarkLayer,
+        signals: ExportSignals,
+        cancel_event: threading.Event,
+    ) -> None:
+        super().__init__()
+        self._path = path
+        self._watermark = watermark
+        self._export = export
+        self._layer = layer
+        self._signals = signals
+        self._cancel_event = cancel_event
+
+    def run(self) -> None:
+        if self._cancel_event.is_set():
+            self._signals.cancelled.emit(self._path)
+            return
+        try:
+            target = export_image(self._path, self._watermark, self._export, self._layer)
+        except Exception as exc:  # noqa: BLE001
+            self._signals.error.emit(self._path, str(exc))
+            return
+        self._signals.finished.emit(self._path, str(target))
@@ -0,0 +1,61 @@
+"""Shared font and text outline lookups."""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Tuple
+
+from PyQt6.QtCore import QRectF
+from PyQt6.QtGui import QFont, QFontMetrics, QPainterPath
+
+
+@lru_cache(maxsize=16)
+def get_font(family: str, size: int, bold: bool = False, italic: bool = False) -> QFont:
+    """Return a shared QFont; callers must copy it before modifying."""
+    font = QFont(family or "Arial", pointSize=size)
+    font.setBold(bold)
+    font.setItalic(italic)
+    return font
+
+
+@lru_cache(maxsize=16)
+def get_font_metrics(family: str, size: int, bold: bool = False, italic: bool = False) -> QFontMetrics:
+    """Return shared metrics for the font ``get_font`` builds from the same arguments."""
+    return QFontMetrics(get_font(family, size, bold, italic))
+
+
+def get_text_path(text: str, family: str, size: int, bold: bool = False, italic: bool = False) -> QPainterPath:
+    """Return the outline of ``text`` with its bounding box at the origin.
+
+    The result is a shallow copy of a cached path, so callers may modify it.
+    """
+    return QPainterPath(_cached_text_path(text, family, size, bold, italic)[0])
+
+
+def get_text_rect(text: str, family: str, size: int, bold: bool = False, italic: bool = False) -> QRectF:
+    """Return the bounding box of ``get_text_path`` without re-measuring the path."""
+    return QRectF(_cached_text_path(text, family, size, bold, italic)[1])
+
+
+@lru_cache(maxsize=32)
+def _cached_text_path(text: str, family: str, size: int, bold: bool, italic: bool) -> Tuple[QPainterPath, QRectF]:
+    metrics = get_font_metrics(family, size, bold, italic)
+    ascent = metrics.ascent()
+    spacing = metrics.lineSpacing()
+    path = QPainterPath()
+    for index, line in enumerate(text.splitlines() or [""]):
+        path.addPath(_line_path(line or " ", family, size, bold, italic).translated(0, ascent + index * spacing))
+    if path.isEmpty():
+        path.addPath(_line_path(" ", family, size, bold, italic).translated(0, ascent))
+    rect = path.boundingRect()
+    if rect.x() != 0 or rect.y() != 0:
+        path.translate(-rect.x(), -rect.y())
+        rect.moveTo(0, 0)
+    return path, rect
+
+
+@lru_cache(maxsize=64)
+def _line_path(line: str, family: str, size: int, bold: bool, italic: bool) -> QPainterPath:
+    """One line of text with its baseline at y=0, so edits only re-shape the changed line."""
+    path = QPainterPath()
+    path.addText(0, 0, get_font(family, size, bold, italic), line)
+    return path
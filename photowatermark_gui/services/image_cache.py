@@ -0,0 +1,82 @@
+"""In-memory cache for decoded preview images."""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+from PyQt6.QtCore import QSize, Qt
+from PyQt6.QtGui import QImage, QImageReader
+
+PREVIEW_CACHE_SIZE = 8
+# Longest side of the images handed to the preview widget.
+PREVIEW_MAX_SIDE = 1600
+
+_preview_cache: "OrderedDict[Tuple[str, int], Tuple[QImage, QSize]]" = OrderedDict()
+_preview_lock = threading.Lock()
+
+
+def _preview_key(path: Path) -> Optional[Tuple[str, int]]:
+    try:
+        return str(path), path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _peek(key: Tuple[str, int]) -> Optional[Tuple[QImage, QSize]]:
+    with _preview_lock:
+        entry = _preview_cache.get(key)
+        if entry is not None:
+            _preview_cache.move_to_end(key)
+        return entry
+
+
+def peek_preview(path: Path) -> Optional[Tuple[QImage, QSize]]:
+    """Return the cached preview for ``path`` without decoding, if present."""
+    key = _preview_key(path)
+    return _peek(key) if key is not None else None
+
+
+def read_scaled(path: Path, max_side: int) -> Tuple[QImage, QSize]:
+    """Decode ``path`` to fit within ``max_side``; also returns the source size.
+
+    Shrinking happens inside the decoder, so the JPEG plugin can decode at
+    1/2, 1/4 or 1/8 scale. The source size is invalid if the header is unreadable.
+    """
+    reader = QImageReader(str(path))
+    size = reader.size()
+    if size.isValid() and max(size.width(), size.height()) > max_side:
+        reader.setScaledSize(size.scaled(max_side, max_side, Qt.AspectRatioMode.KeepAspectRatio))
+    return reader.read(), size
+
+
+def get_preview(path: Path) -> Tuple[QImage, QSize]:
+    """Return ``path`` decoded to at most PREVIEW_MAX_SIDE, and its full size.
+
+    The image is null if the file cannot be decoded.
+    """
+    key = _preview_key(path)
+    if key is None:
+        return QImage(), QSize()
+    cached = _peek(key)
+    if cached is not None:
+        return cached
+    image, size = read_scaled(path, PREVIEW_MAX_SIDE)
+    if image.isNull():
+        return image, QSize()
+    # QImage is implicitly shared, callers get copy-on-write semantics.
+    entry = (image, size if size.isValid() else image.size())
+    with _preview_lock:
+        _preview_cache[key] = entry
+        while len(_preview_cache) > PREVIEW_CACHE_SIZE:
+            _preview_cache.popitem(last=False)
+    return entry
+
+
+def discard(paths: Iterable[Path]) -> None:
+    """Drop cached previews for ``paths``, e.g. after they leave the list."""
+    names = {str(path) for path in paths}
+    with _preview_lock:
+        for key in [key for key in _preview_cache if key[0] in names]:
+            del _preview_cache[key]
@@ -1,31 +1,55 @@
 """Helpers for importing and preparing images."""
 from __future__ import annotations
 
+import hashlib
+import io
+import os
 from collections import deque
+from functools import lru_cache
 from pathlib import Path
-from typing import Iterable, List
+from typing import Callable, Iterable, List, Optional
 
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QImage, QPixmap
+from PIL import Image
 
+from PyQt6.QtCore import QObject, QRunnable, QSize, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QImage
+
+from . import image_cache
 from .watermark import ALLOWED_INPUT_SUFFIXES
 
+THUMBNAIL_CACHE_DIR = Path.home() / ".photo_watermark_gui" / "thumbs"
+# Thumbnails kept on disk; older ones are pruned at startup.
+THUMBNAIL_CACHE_LIMIT = 2000
+
 
 def filter_supported_images(paths: Iterable[Path]) -> List[Path]:
     unique: List[Path] = []
     seen: set[Path] = set()
-    queue = deque(Path(p) for p in paths)
+    # Entries found by scandir carry their is_dir() result so they need no
+    # further stat; unsupported files are dropped before resolve().
+    queue: deque[tuple[Path, Optional[bool]]] = deque((Path(p), None) for p in paths)
     while queue:
-        path = queue.popleft()
+        path, is_dir = queue.popleft()
         try:
             path = path.expanduser().resolve()
         except OSError:
             continue
-        if path in seen or not path.exists():
+        if path in seen:
             continue
-        if path.is_dir():
-            for child in path.iterdir():
-                queue.append(child)
+        if is_dir is None:
+            if not path.exists():
+                continue
+            is_dir = path.is_dir()
+        if is_dir:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        queue.append((Path(entry.path), True))
+                    elif (
+                        os.path.splitext(entry.name)[1].lower() in ALLOWED_INPUT_SUFFIXES
+                        and entry.is_file()
+                    ):
+                        queue.append((Path(entry.path), False))
             seen.add(path)
             continue
         suffix = path.suffix.lower()
@@ -35,15 +59,207 @@ def filter_supported_images(paths: Iterable[Path]) -> List[Path]:
     return unique
 
 
-def load_qimage(path: Path) -> QImage:
-    image = QImage(str(path))
-    return image
+def scan_folder(folder: Path) -> List[Path]:
+    """List supported images directly inside ``folder`` (non-recursive)."""
+    with os.scandir(folder) as entries:
+        return [
+            Path(entry.path)
+            for entry in entries
+            if os.path.splitext(entry.name)[1].lower() in ALLOWED_INPUT_SUFFIXES
+            and entry.is_file()
+        ]
+
+
+class FolderScanSignals(QObject):
+    """Delivers folder scan results back to the GUI thread."""
+
+    finished = pyqtSignal(Path, list)
+    error = pyqtSignal(Path, str)
+
+
+class FolderScanTask(QRunnable):
+    """Runs :func:`scan_folder` on a worker thread."""
+
+    def __init__(self, folder: Path, signals: FolderScanSignals) -> None:
+        super().__init__()
+        self._folder = folder
+        self._signals = signals
+
+    def run(self) -> None:
+        try:
+            files = scan_folder(self._folder)
+        except OSError as exc:
+            self._signals.error.emit(self._folder, str(exc))
+            return
+        self._signals.finished.emit(self._folder, files)
+
+
+class _PreviewSignals(QObject):
+    loaded = pyqtSignal(int, Path, QImage, QSize)
+
+
+class _PreviewTask(QRunnable):
+    def __init__(self, seq: int, path: Path, signals: _PreviewSignals, latest: Callable[[], int]) -> None:
+        super().__init__()
+        self._seq = seq
+        self._path = path
+        self._signals = signals
+        self._latest = latest
+
+    def run(self) -> None:
+        if self._seq != self._latest():
+            return
+        self._signals.loaded.emit(self._seq, self._path, *image_cache.get_preview(self._path))
+
+
+class _PrefetchTask(QRunnable):
+    def __init__(self, path: Path) -> None:
+        super().__init__()
+        self._path = path
+
+    def run(self) -> None:
+        image_cache.get_preview(self._path)
+
+
+class PreviewLoader(QObject):
+    """Decodes preview images off the GUI thread.
+
+    Only the most recent request is reported through ``loaded``; results of
+    superseded requests are dropped. Cached images are delivered immediately.
+    ``loaded`` carries the downscaled preview and the source's full size.
+    """
+
+    loaded = pyqtSignal(Path, QImage, QSize)
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self._seq = 0
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(2)
+        self._signals = _PreviewSignals(self)
+        self._signals.loaded.connect(self._on_loaded)
+
+    def load(self, path: Path) -> None:
+        self._seq += 1
+        cached = image_cache.peek_preview(path)
+        if cached is not None:
+            self.loaded.emit(path, *cached)
+            return
+        self._pool.start(_PreviewTask(self._seq, path, self._signals, lambda: self._seq), 1)
 
+    def prefetch(self, paths: Iterable[Path]) -> None:
+        """Warm the cache for ``paths`` behind any pending ``load``."""
+        for path in paths:
+            if image_cache.peek_preview(path) is None:
+                self._pool.start(_PrefetchTask(path), -1)
 
-def make_thumbnail(path: Path, size: int = 96) -> QPixmap:
-    image = QImage(str(path))
+    def _on_loaded(self, seq: int, path: Path, image: QImage, source_size: QSize) -> None:
+        if seq != self._seq:
+            return
+        self.loaded.emit(path, image, source_size)
+
+
+def _thumbnail_cache_path(path: Path, mtime_ns: int, size: int) -> Path:
+    key = f"{path}|{mtime_ns}|{size}".encode("utf-8")
+    return THUMBNAIL_CACHE_DIR / f"{hashlib.blake2b(key, digest_size=16).hexdigest()}.png"
+
+
+def load_thumbnail_image(path: Path, size: int = 96) -> QImage:
+    """Return a thumbnail for ``path``, using the memory and disk caches when possible.
+
+    Only QImageReader and Pillow are used, so this is safe to call off the GUI
+    thread. Returns a null image if the file cannot be decoded.
+    """
+    try:
+        stat = path.stat()
+    except OSError:
+        return QImage()
+    return _cached_thumbnail(str(path), stat.st_mtime_ns, stat.st_size, size)
+
+
+@lru_cache(maxsize=512)
+def _cached_thumbnail(path_str: str, mtime_ns: int, file_size: int, size: int) -> QImage:
+    path = Path(path_str)
+    cache_path = _thumbnail_cache_path(path, mtime_ns, size)
+    if cache_path.exists():
+        cached = QImage(str(cache_path))
+        if not cached.isNull():
+            return cached
+
+    image, _ = image_cache.read_scaled(path, size)
     if image.isNull():
-        return QPixmap()
-    scaled = image.scaled(size, size, transformMode=Qt.TransformationMode.SmoothTransformation, aspectRatioMode=Qt.AspectRatioMode.KeepAspectRatio)
-    pixmap = QPixmap.fromImage(scaled)
-    return pixmap
+        image = _pil_thumbnail(path, size)
+        if image.isNull():
+            return image
+    try:
+        THUMBNAIL_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        return image
+    image.save(str(cache_path), "PNG")
+    return image
+
+
+def prune_thumbnail_cache(limit: int = THUMBNAIL_CACHE_LIMIT) -> None:
+    """Delete the oldest cached thumbnails so that at most ``limit`` remain."""
+    files = []
+    try:
+        with os.scandir(THUMBNAIL_CACHE_DIR) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".png"):
+                    continue
+                try:
+                    files.append((entry.stat().st_mtime_ns, entry.path))
+                except OSError:
+                    continue
+    except OSError:
+        return
+    if len(files) <= limit:
+        return
+    files.sort()
+    for _, stale in files[: len(files) - limit]:
+        try:
+            os.remove(stale)
+        except OSError:
+            continue
+
+
+def _pil_thumbnail(path: Path, size: int) -> QImage:
+    """Fallback for formats Qt has no plugin for."""
+    try:
+        with Image.open(path) as source:
+            source.draft("RGB", (size * 2, size * 2))
+            source.thumbnail((size, size))
+            thumb = source if source.mode in ("RGB", "RGBA") else source.convert("RGBA")
+            buffer = io.BytesIO()
+            thumb.save(buffer, format="PNG")
+    except (OSError, ValueError):
+        return QImage()
+    return QImage.fromData(buffer.getvalue(), "PNG")
+
+
+class ThumbnailSignals(QObject):
+    """Delivers finished thumbnails back to the GUI thread."""
+
+    thumbnail_ready = pyqtSignal(Path, QImage)
+
+
+class ThumbnailTask(QRunnable):
+    """Builds one thumbnail on a worker thread."""
+
+    def __init__(self, path: Path, size: int, signals: ThumbnailSignals) -> None:
+        super().__init__()
+        self._path = path
+        self._size = size
+        self._signals = signals
+
+    def run(self) -> None:
+        image = load_thumbnail_image(self._path, self._size)
+        if not image.isNull():
+            self._signals.thumbnail_ready.emit(self._path, image)
+
+
+def prefetch_thumbnails(paths: Iterable[Path], size: int, signals: ThumbnailSignals) -> None:
+    """Build thumbnails for ``paths`` in parallel, reporting each through ``signals``."""
+    pool = QThreadPool.globalInstance()
+    for path in paths:
+        pool.start(ThumbnailTask(path, size, signals))
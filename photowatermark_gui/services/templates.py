@@ -4,13 +4,19 @@ from __future__ import annotations
 import json
 from dataclasses import asdict
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 
 from ..models import ExportSettings, WatermarkSettings
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
 APP_DIR = Path.home() / ".photo_watermark_gui"
 TEMPLATES_FILE = APP_DIR / "templates.json"
 LAST_SESSION_FILE = APP_DIR / "last_session.json"
+LAST_SESSION_PATHS_FILE = APP_DIR / "last_session.paths"
 
 
 class TemplateManager:
@@ -18,13 +24,15 @@ class TemplateManager:
 
     def __init__(self) -> None:
         APP_DIR.mkdir(parents=True, exist_ok=True)
+        self._templates_cache: Optional[Dict] = None
+        self._templates_mtime = -1
 
     def list_templates(self) -> List[str]:
-        payload = self._read_file(TEMPLATES_FILE)
+        payload = self._get_templates()
         return sorted(payload.keys()) if payload else []
 
     def load_template(self, name: str) -> Optional[Dict]:
-        payload = self._read_file(TEMPLATES_FILE)
+        payload = self._get_templates()
         if not payload:
             return None
         return payload.get(name)
@@ -35,49 +43,78 @@ class TemplateManager:
         watermark: WatermarkSettings,
         export: ExportSettings,
     ) -> None:
-        payload = self._read_file(TEMPLATES_FILE) or {}
+        payload = dict(self._get_templates() or {})
         payload[name] = {
             "watermark": watermark.to_dict(),
             "export": export.to_dict(),
         }
-        self._write_file(TEMPLATES_FILE, payload)
+        self._write_templates(payload)
 
     def delete_template(self, name: str) -> None:
-        payload = self._read_file(TEMPLATES_FILE) or {}
+        payload = dict(self._get_templates() or {})
         if name in payload:
             payload.pop(name)
-            self._write_file(TEMPLATES_FILE, payload)
+            self._write_templates(payload)
 
     def rename_template(self, old_name: str, new_name: str) -> bool:
         if old_name == new_name:
             return True
-        payload = self._read_file(TEMPLATES_FILE) or {}
+        payload = dict(self._get_templates() or {})
         if old_name not in payload:
             return False
         if new_name in payload:
             return False
         payload[new_name] = payload.pop(old_name)
-        self._write_file(TEMPLATES_FILE, payload)
+        self._write_templates(payload)
         return True
 
-    def save_last_session(self, data: Dict) -> None:
+    def save_last_session(self, data: Dict, images: Iterable[Path] = ()) -> None:
+        """Persist session settings; image paths go to a one-per-line sidecar."""
         self._write_file(LAST_SESSION_FILE, data)
+        LAST_SESSION_PATHS_FILE.write_text("\n".join(str(p) for p in images), encoding="utf-8")
 
     def load_last_session(self) -> Optional[Dict]:
-        return self._read_file(LAST_SESSION_FILE)
+        data = self._read_file(LAST_SESSION_FILE)
+        if data is None:
+            return None
+        if LAST_SESSION_PATHS_FILE.exists():
+            lines = LAST_SESSION_PATHS_FILE.read_text(encoding="utf-8").splitlines()
+            data["images"] = [line for line in lines if line]
+        return data
 
     def has_last_session(self) -> bool:
         return LAST_SESSION_FILE.exists()
 
+    def _get_templates(self) -> Optional[Dict]:
+        """Return the parsed templates file, re-reading only when it changed on disk."""
+        try:
+            mtime = TEMPLATES_FILE.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if mtime != self._templates_mtime:
+            self._templates_cache = self._read_file(TEMPLATES_FILE)
+            self._templates_mtime = mtime
+        return self._templates_cache
+
+    def _write_templates(self, payload: Dict) -> None:
+        self._write_file(TEMPLATES_FILE, payload)
+        self._templates_cache = payload
+        self._templates_mtime = TEMPLATES_FILE.stat().st_mtime_ns
+
     def _read_file(self, path: Path) -> Optional[Dict]:
-        if not path.exists():
+        try:
+            raw = path.read_bytes()
+        except FileNotFoundError:
             return None
         try:
-            with path.open("r", encoding="utf-8") as handle:
-                return json.load(handle)
+            if orjson is not None:
+                return orjson.loads(raw)
+            return json.loads(raw)
         except json.JSONDecodeError:
             return None
 
     def _write_file(self, path: Path, data: Dict) -> None:
-        with path.open("w", encoding="utf-8") as handle:
-            json.dump(data, handle, ensure_ascii=False, indent=2)
+        if orjson is not None:
+            path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+            return
+        path.write_bytes(json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8"))
@@ -1,68 +1,137 @@
 """Watermark rendering helpers."""
 from __future__ import annotations
 
+import math
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Tuple
 
-from PIL import Image, ImageQt
+from PIL import Image
 
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QColor, QFont, QFontMetrics, QPainter, QPainterPath, QPen
+from PyQt6.QtCore import QPointF, Qt
+from PyQt6.QtGui import QColor, QPainter, QPen, QTransform
 from PyQt6.QtGui import QImage as QtImage
 
 from ..models import ExportSettings, WatermarkSettings
+from .fonts import get_font, get_text_path, get_text_rect
 
-ALLOWED_INPUT_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff"}
+ALLOWED_INPUT_SUFFIXES = frozenset({".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff"})
+JPEG_SUFFIXES = frozenset({".jpg", ".jpeg"})
+# Source formats that "auto" output keeps; everything else becomes PNG.
+_PASSTHROUGH_SUFFIXES = JPEG_SUFFIXES | {".png"}
+_FORMAT_SUFFIX = {"jpeg": ".jpg", "png": ".png"}
 
 
-def scale_image(image: Image.Image, settings: ExportSettings) -> Image.Image:
-    if settings.scale_mode == "none":
-        return image
-    width, height = image.size
+def target_size(size: Tuple[int, int], settings: ExportSettings) -> Tuple[int, int]:
+    """Return the export size for an image of ``size`` under ``settings``."""
+    width, height = size
     if settings.scale_mode == "percent":
         ratio = settings.scale_value / 100.0
-        return image.resize((int(width * ratio), int(height * ratio)), Image.Resampling.LANCZOS)
+        return int(width * ratio), int(height * ratio)
     if settings.scale_mode == "width" and settings.scale_value > 0:
         new_width = settings.scale_value
         ratio = new_width / width
-        return image.resize((new_width, int(height * ratio)), Image.Resampling.LANCZOS)
+        return new_width, int(height * ratio)
     if settings.scale_mode == "height" and settings.scale_value > 0:
         new_height = settings.scale_value
         ratio = new_height / height
-        return image.resize((int(width * ratio), new_height), Image.Resampling.LANCZOS)
-    return image
-
-
-def _build_text_path(text: str, font: QFont) -> QPainterPath:
-    metrics = QFontMetrics(font)
-    lines = text.splitlines() or [""]
-    path = QPainterPath()
-    y = 0
-    for line in lines:
-        content = line or " "
-        path.addText(0, y + metrics.ascent(), font, content)
-        y += metrics.lineSpacing()
-    if path.isEmpty():
-        path.addText(0, metrics.ascent(), font, " ")
-    rect = path.boundingRect()
-    if rect.x() != 0 or rect.y() != 0:
-        path.translate(-rect.x(), -rect.y())
-    return path
+        return int(width * ratio), new_height
+    return width, height
+
+
+def _resize(image: Image.Image, size: Tuple[int, int]) -> Image.Image:
+    """LANCZOS resize; shrinks below half size box-reduce first."""
+    shrink = size[0] * 2 < image.width or size[1] * 2 < image.height
+    return image.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0 if shrink else None)
 
 
+def scale_image(
+    image: Image.Image,
+    settings: ExportSettings,
+    source_size: Tuple[int, int] | None = None,
+) -> Image.Image:
+    """Resize ``image`` for export.
+
+    ``source_size`` is the original image size when ``image`` was decoded at
+    reduced scale (see ``Image.draft``); the target is computed from it.
+    """
+    if settings.scale_mode == "none":
+        return image
+    new_size = target_size(source_size or image.size, settings)
+    if new_size == image.size:
+        return image
+    return _resize(image, new_size)
+
+
+@lru_cache(maxsize=256)
 def _parse_color(color: str, alpha: int) -> QColor:
+    """Return a shared QColor; callers must not modify it."""
     qcolor = QColor(color if color else "#FFFFFF")
     qcolor.setAlpha(alpha)
     return qcolor
 
 
-def _render_text_layer(
-    base_size: Tuple[int, int],
-    watermark: WatermarkSettings,
-) -> Image.Image:
-    width, height = base_size
-    if width <= 0 or height <= 0:
-        return Image.new("RGBA", base_size, (0, 0, 0, 0))
+@dataclass(frozen=True)
+class WatermarkLayer:
+    """A pre-rendered watermark tile and the geometry needed to place it."""
+
+    image: Image.Image
+    content_size: Tuple[float, float]  # size used to resolve position_ratio
+    origin: Tuple[int, int]  # tile offset relative to the content box
+
+
+def _render_text_layer(watermark: WatermarkSettings) -> WatermarkLayer:
+    return _cached_text_layer(
+        watermark.text,
+        watermark.font_family,
+        watermark.font_size,
+        watermark.bold,
+        watermark.italic,
+        watermark.color,
+        watermark.opacity,
+        watermark.shadow,
+        watermark.outline,
+        watermark.rotation,
+    )
+
+
+@lru_cache(maxsize=8)
+def _cached_text_layer(
+    text: str,
+    font_family: str,
+    font_size: int,
+    bold: bool,
+    italic: bool,
+    color: str,
+    opacity: int,
+    shadow: bool,
+    outline: bool,
+    rotation: float,
+) -> WatermarkLayer:
+    font = get_font(font_family, font_size, bold, italic)
+    path = get_text_path(text, font_family, font_size, bold, italic)
+    rect = get_text_rect(text, font_family, font_size, bold, italic)
+
+    alpha = int(255 * (opacity / 100))
+    fill_color = _parse_color(color, alpha)
+    shadow_offset = max(2.0, font.pointSizeF() * 0.08)
+    outline_width = max(1.5, font.pointSizeF() * 0.1)
+
+    transform = QTransform()
+    if rotation:
+        center = rect.center()
+        transform.translate(center.x(), center.y())
+        transform.rotate(-rotation)
+        transform.translate(-center.x(), -center.y())
+
+    margin = outline_width + 1.0
+    extra = shadow_offset if shadow else 0.0
+    bounds = transform.mapRect(rect.adjusted(-margin, -margin, margin + extra, margin + extra))
+    left = math.floor(bounds.left())
+    top = math.floor(bounds.top())
+    width = max(1, math.ceil(bounds.right()) - left)
+    height = max(1, math.ceil(bounds.bottom()) - top)
 
     image = QtImage(width, height, QtImage.Format.Format_ARGB32_Premultiplied)
     image.fill(Qt.GlobalColor.transparent)
@@ -73,54 +142,44 @@ def _render_text_layer(
         | QPainter.RenderHint.TextAntialiasing
         | QPainter.RenderHint.SmoothPixmapTransform
     )
+    painter.translate(-left, -top)
+    painter.setTransform(transform, True)
 
-    font = QFont(watermark.font_family or "Arial", pointSize=watermark.font_size)
-    font.setBold(watermark.bold)
-    font.setItalic(watermark.italic)
-    path = _build_text_path(watermark.text, font)
-    rect = path.boundingRect()
-
-    available_w = max(width - rect.width(), 1)
-    available_h = max(height - rect.height(), 1)
-    pos_x = watermark.position_ratio.x() * available_w
-    pos_y = watermark.position_ratio.y() * available_h
-
-    translate_x = pos_x
-    translate_y = pos_y
-
-    alpha = int(255 * (watermark.opacity / 100))
-    fill_color = _parse_color(watermark.color, alpha)
-    shadow_offset = max(2.0, font.pointSizeF() * 0.08)
-    outline_width = max(1.5, font.pointSizeF() * 0.1)
-
-    painter.translate(translate_x, translate_y)
-    if watermark.rotation:
-        center = rect.center()
-        painter.translate(center)
-        painter.rotate(-watermark.rotation)
-        painter.translate(-center)
-
-    if watermark.shadow:
-        shadow_color = QColor(0, 0, 0, int(alpha * 0.6))
+    if shadow:
+        shadow_color = _parse_color("#000000", int(alpha * 0.6))
         painter.setPen(Qt.PenStyle.NoPen)
         painter.setBrush(shadow_color)
         painter.drawPath(path.translated(shadow_offset, shadow_offset))
 
-    painter.setPen(Qt.PenStyle.NoPen)
-    painter.setBrush(fill_color)
-    painter.drawPath(path)
-
-    if watermark.outline:
-        outline_color = QColor(0, 0, 0, alpha)
+    # drawPath fills before it strokes, so the outline still lands on top.
+    if outline:
+        outline_color = _parse_color("#000000", alpha)
         pen = QPen(outline_color, outline_width, Qt.PenStyle.SolidLine, Qt.PenCapStyle.RoundCap, Qt.PenJoinStyle.RoundJoin)
         painter.setPen(pen)
-        painter.setBrush(Qt.BrushStyle.NoBrush)
-        painter.drawPath(path)
+    else:
+        painter.setPen(Qt.PenStyle.NoPen)
+    painter.setBrush(fill_color)
+    painter.drawPath(path)
 
     painter.end()
 
-    pil_image = ImageQt.fromqimage(image)
-    return pil_image.copy()
+    return WatermarkLayer(_to_pil(image), (rect.width(), rect.height()), (left, top))
+
+
+def _to_pil(image: QtImage) -> Image.Image:
+    """Copy a QImage into a Pillow RGBA image.
+
+    ``ImageQt.fromqimage`` round-trips through an in-memory PNG; reading the
+    pixels directly skips that encode and decode. Pillow reads the scanlines
+    through the buffer protocol, so they are not staged in a bytes object.
+    """
+    rgba = image.convertToFormat(QtImage.Format.Format_RGBA8888)
+    bits = rgba.constBits()
+    bits.setsize(rgba.sizeInBytes())
+    return Image.frombytes("RGBA", (rgba.width(), rgba.height()), bits, "raw", "RGBA", rgba.bytesPerLine())
+
+
+_IDENTITY_LUT = list(range(256))
 
 
 def _apply_opacity(pil_image: Image.Image, opacity: int) -> Image.Image:
@@ -128,67 +187,112 @@ def _apply_opacity(pil_image: Image.Image, opacity: int) -> Image.Image:
         pil_image = pil_image.convert("RGBA")
     if opacity >= 100:
         return pil_image
-    alpha = pil_image.split()[-1]
     factor = max(0.0, min(1.0, opacity / 100.0))
-
-    def scale(value: int) -> int:
-        return int(value * factor)
-
-    alpha = alpha.point(scale)
-    pil_image.putalpha(alpha)
-    return pil_image
+    # One table per band: colour passes through, alpha is scaled, all in a
+    # single C pass without splitting the bands.
+    alpha_lut = [int(value * factor) for value in range(256)]
+    return pil_image.point(_IDENTITY_LUT * 3 + alpha_lut)
 
 
-def _render_image_layer(
-    base_size: Tuple[int, int],
-    watermark: WatermarkSettings,
-) -> Image.Image:
-    width, height = base_size
-    if width <= 0 or height <= 0 or not watermark.image_path:
-        return Image.new("RGBA", base_size, (0, 0, 0, 0))
+def _render_image_layer(watermark: WatermarkSettings) -> WatermarkLayer:
+    if not watermark.image_path:
+        return WatermarkLayer(Image.new("RGBA", (1, 1), (0, 0, 0, 0)), (1.0, 1.0), (0, 0))
 
     image_path = Path(watermark.image_path)
-    if not image_path.exists():
-        raise FileNotFoundError(f"水印图片未找到：{image_path}")
+    try:
+        mtime_ns = image_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        raise FileNotFoundError(f"水印图片未找到：{image_path}") from None
+
+    return _cached_image_layer(
+        str(image_path),
+        mtime_ns,
+        watermark.image_scale,
+        watermark.opacity,
+        watermark.rotation,
+    )
+
 
-    overlay = Image.open(image_path).convert("RGBA")
-    scale_percent = max(1, watermark.image_scale)
+@lru_cache(maxsize=8)
+def _cached_image_layer(
+    image_path: str,
+    mtime_ns: int,
+    image_scale: int,
+    opacity: int,
+    rotation: float,
+) -> WatermarkLayer:
+    with Image.open(image_path) as source:
+        overlay = source.convert("RGBA")
+    scale_percent = max(1, image_scale)
     scale_factor = scale_percent / 100.0
     new_size = (
         max(1, int(overlay.width * scale_factor)),
         max(1, int(overlay.height * scale_factor)),
     )
-    overlay = overlay.resize(new_size, Image.Resampling.LANCZOS)
-    overlay = _apply_opacity(overlay, watermark.opacity)
+    if new_size != overlay.size:
+        overlay = _resize(overlay, new_size)
+    overlay = _apply_opacity(overlay, opacity)
 
-    if watermark.rotation:
-        overlay = overlay.rotate(-watermark.rotation, expand=True, resample=Image.Resampling.BICUBIC)
+    # Pillow turns right angles into an exact transpose() by itself.
+    if rotation % 360:
+        overlay = overlay.rotate(-rotation, expand=True, resample=Image.Resampling.BICUBIC)
 
-    layer = Image.new("RGBA", base_size, (0, 0, 0, 0))
-    available_w = max(width - overlay.width, 1)
-    available_h = max(height - overlay.height, 1)
-    pos_x = int(watermark.position_ratio.x() * available_w)
-    pos_y = int(watermark.position_ratio.y() * available_h)
+    return WatermarkLayer(overlay, (float(overlay.width), float(overlay.height)), (0, 0))
 
-    layer.paste(overlay, (pos_x, pos_y), mask=overlay)
-    return layer
 
+def render_watermark_layer(watermark: WatermarkSettings) -> WatermarkLayer:
+    """Render the watermark once so it can be composed onto many images.
 
-def render_watermark_layer(
-    base_size: Tuple[int, int],
-    watermark: WatermarkSettings,
-) -> Image.Image:
+    Layers are cached on the visual settings; position is applied later by
+    :func:`compose_with_layer`.
+    """
     if watermark.mode == "image":
-        return _render_image_layer(base_size, watermark)
-    return _render_text_layer(base_size, watermark)
+        return _render_image_layer(watermark)
+    return _render_text_layer(watermark)
 
 
-def compose_watermark(
+def compose_with_layer(
     image: Image.Image,
-    watermark_settings: WatermarkSettings,
+    layer: WatermarkLayer,
+    position_ratio: QPointF,
+    inplace: bool = False,
 ) -> Image.Image:
-    watermark_layer = render_watermark_layer(image.size, watermark_settings)
-    return Image.alpha_composite(image.convert("RGBA"), watermark_layer)
+    """Blend ``layer`` onto a copy of ``image``.
+
+    RGB images stay RGB: only the region under the tile is converted to RGBA,
+    blended and pasted back. Other modes are converted to RGBA as a whole.
+    With ``inplace`` an RGB or RGBA ``image`` is modified and returned
+    instead of copied.
+    """
+    if image.mode in ("RGB", "RGBA"):
+        composed = image if inplace else image.copy()
+    else:
+        composed = image.convert("RGBA")
+    width, height = composed.size
+    content_w, content_h = layer.content_size
+    available_w = max(width - content_w, 1)
+    available_h = max(height - content_h, 1)
+    left = int(round(position_ratio.x() * available_w)) + layer.origin[0]
+    top = int(round(position_ratio.y() * available_h)) + layer.origin[1]
+
+    # Only the region covered by the tile is blended; clip it to the image.
+    src_left = max(0, -left)
+    src_top = max(0, -top)
+    dest_left = max(0, left)
+    dest_top = max(0, top)
+    right = min(width, left + layer.image.width)
+    bottom = min(height, top + layer.image.height)
+    if right <= dest_left or bottom <= dest_top:
+        return composed
+    source = (src_left, src_top, src_left + right - dest_left, src_top + bottom - dest_top)
+    if composed.mode == "RGBA":
+        composed.alpha_composite(layer.image, dest=(dest_left, dest_top), source=source)
+        return composed
+    box = (dest_left, dest_top, right, bottom)
+    region = composed.crop(box).convert("RGBA")
+    region.alpha_composite(layer.image, source=source)
+    composed.paste(region.convert("RGB"), box)
+    return composed
 
 
 def compute_output_path(
@@ -202,12 +306,9 @@ def compute_output_path(
     elif export.naming_mode == "suffix":
         stem = f"{stem}{export.suffix}"
 
-    if export.output_format == "jpeg":
-        suffix = ".jpg"
-    elif export.output_format == "png":
-        suffix = ".png"
-    else:
+    suffix = _FORMAT_SUFFIX.get(export.output_format)
+    if suffix is None:
         suffix = source.suffix.lower()
-        if suffix not in {".jpg", ".jpeg", ".png"}:
+        if suffix not in _PASSTHROUGH_SUFFIXES:
             suffix = ".png"
     return output_dir / f"{stem}{suffix}"
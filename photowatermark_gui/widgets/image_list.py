@@ -2,13 +2,16 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Callable, Iterable, List
+from typing import Callable, Dict, Iterable, List
 
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QIcon
+from PyQt6.QtCore import QSize, Qt
+from PyQt6.QtGui import QIcon, QImage, QPixmap
 from PyQt6.QtWidgets import QListWidget, QListWidgetItem, QMenu
 
-from ..services.image_loader import filter_supported_images, make_thumbnail
+from ..services.image_loader import ThumbnailSignals, filter_supported_images, prefetch_thumbnails
+
+THUMBNAIL_SIZE = 96
+ROW_PADDING = 4
 
 
 class ImageListWidget(QListWidget):
@@ -26,6 +29,30 @@ class ImageListWidget(QListWidget):
         self.setSelectionMode(QListWidget.SelectionMode.SingleSelection)
         self.setAcceptDrops(True)
         self.setDragDropMode(QListWidget.DragDropMode.DropOnly)
+        self.setIconSize(QSize(THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        # Uniform rows let the view lay out large lists without measuring each
+        # item. Rows span the viewport and long names are elided in the middle
+        # (keeping the extension visible) instead of being measured one by one.
+        self.setUniformItemSizes(True)
+        self.setTextElideMode(Qt.TextElideMode.ElideMiddle)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self._update_grid_size()
+        placeholder = QPixmap(THUMBNAIL_SIZE, THUMBNAIL_SIZE)
+        placeholder.fill(Qt.GlobalColor.transparent)
+        # Shown until the real thumbnail arrives, so rows keep their height.
+        self._placeholder_icon = QIcon(placeholder)
+        self._items: Dict[Path, QListWidgetItem] = {}
+        self._thumbnail_signals = ThumbnailSignals(self)
+        self._thumbnail_signals.thumbnail_ready.connect(self._on_thumbnail_ready)
+
+    def resizeEvent(self, event) -> None:
+        super().resizeEvent(event)
+        self._update_grid_size()
+
+    def _update_grid_size(self) -> None:
+        width = max(THUMBNAIL_SIZE, self.viewport().width())
+        if self.gridSize().width() != width:
+            self.setGridSize(QSize(width, THUMBNAIL_SIZE + ROW_PADDING))
 
     def dragEnterEvent(self, event) -> None:
         if event.mimeData().hasUrls():
@@ -62,17 +89,60 @@ class ImageListWidget(QListWidget):
             if path:
                 self._on_paths_removed([path])
 
+    def clear(self) -> None:
+        self._items.clear()
+        super().clear()
+
     def populate(self, paths: Iterable[Path], selected: Path | None = None) -> None:
-        self.clear()
-        selected_row = -1
-        for index, path in enumerate(paths):
-            item = QListWidgetItem(path.name)
-            pixmap = make_thumbnail(path)
-            if not pixmap.isNull():
-                item.setIcon(QIcon(pixmap))
-            item.setData(Qt.ItemDataRole.UserRole, path)
-            self.addItem(item)
-            if selected and path == selected:
-                selected_row = index
-        if selected_row >= 0:
-            self.setCurrentRow(selected_row)
+        """Make the rows match ``paths``, reusing rows (and icons) already listed."""
+        paths = list(paths)
+        wanted = set(paths)
+        added: List[Path] = []
+        previous = self.currentItem()
+        self.setUpdatesEnabled(False)
+        blocked = self.blockSignals(True)
+        try:
+            for row in range(self.count() - 1, -1, -1):
+                path = self.item(row).data(Qt.ItemDataRole.UserRole)
+                if path not in wanted:
+                    self.takeItem(row)
+                    self._items.pop(path, None)
+            for row, path in enumerate(paths):
+                item = self._items.get(path)
+                if item is None:
+                    self.insertItem(row, self._new_item(path))
+                    added.append(path)
+                elif self.item(row) is not item:
+                    self.insertItem(row, self.takeItem(self.row(item)))
+        finally:
+            self.blockSignals(blocked)
+            self.setUpdatesEnabled(True)
+        prefetch_thumbnails(added, THUMBNAIL_SIZE, self._thumbnail_signals)
+        target = self._items.get(selected) if selected is not None else None
+        if target is not None and self.currentItem() is not target:
+            self.setCurrentItem(target)
+        elif self.currentItem() is not previous:
+            # Removing the current row moved the selection while signals were blocked.
+            self.itemSelectionChanged.emit()
+
+    def append(self, paths: Iterable[Path]) -> None:
+        """Add rows for ``paths`` not yet listed, leaving existing rows untouched."""
+        added: List[Path] = []
+        for path in paths:
+            if path in self._items:
+                continue
+            self.addItem(self._new_item(path))
+            added.append(path)
+        prefetch_thumbnails(added, THUMBNAIL_SIZE, self._thumbnail_signals)
+
+    def _new_item(self, path: Path) -> QListWidgetItem:
+        item = QListWidgetItem(self._placeholder_icon, path.name)
+        item.setToolTip(path.name)
+        item.setData(Qt.ItemDataRole.UserRole, path)
+        self._items[path] = item
+        return item
+
+    def _on_thumbnail_ready(self, path: Path, image: QImage) -> None:
+        item = self._items.get(path)
+        if item is not None:
+            item.setIcon(QIcon(QPixmap.fromImage(image)))
@@ -1,11 +1,63 @@
 """Image preview widget with draggable watermark."""
 from __future__ import annotations
 
-from PyQt6.QtCore import QPointF, QRectF, Qt
-from PyQt6.QtGui import QBrush, QColor, QFont, QFontMetrics, QPainter, QPainterPath, QPen, QPixmap
+import math
+import os
+from functools import lru_cache
+
+from PyQt6.QtCore import QPointF, QRectF, Qt, QTimer
+from PyQt6.QtGui import QBrush, QColor, QPainter, QPainterPath, QPen, QPixmap
 from PyQt6.QtWidgets import QGraphicsItem, QGraphicsObject, QGraphicsScene, QGraphicsView
 
 from ..models import WatermarkSettings
+from ..services.fonts import get_font, get_text_path, get_text_rect
+
+
+@lru_cache(maxsize=4)
+def _load_watermark_pixmap(path: str, mtime_ns: int) -> QPixmap:
+    return QPixmap(path)
+
+
+@lru_cache(maxsize=16)
+def _scaled_watermark_pixmap(path: str, mtime_ns: int, scale_percent: int) -> QPixmap:
+    """Decode once per file version, then memoise each scale the slider visits."""
+    pm = _load_watermark_pixmap(path, mtime_ns)
+    if pm.isNull():
+        return pm
+    scale_factor = scale_percent / 100.0
+    new_width = max(1, int(pm.width() * scale_factor))
+    new_height = max(1, int(pm.height() * scale_factor))
+    return pm.scaled(new_width, new_height, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+
+
+def _mtime_ns(path: str | None) -> int | None:
+    if not path:
+        return None
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _style_key(settings: WatermarkSettings) -> tuple:
+    """The settings that change how the watermark looks, as opposed to where it sits.
+
+    Image mode includes the file's mtime so an edited watermark image is reloaded.
+    """
+    if settings.mode == "image":
+        return ("image", settings.image_path, _mtime_ns(settings.image_path), settings.image_scale, settings.opacity)
+    return (
+        "text",
+        settings.text,
+        settings.font_family,
+        settings.font_size,
+        settings.bold,
+        settings.italic,
+        settings.color,
+        settings.opacity,
+        settings.shadow,
+        settings.outline,
+    )
 
 
 class DraggableWatermarkItem(QGraphicsObject):
@@ -16,17 +68,27 @@ class DraggableWatermarkItem(QGraphicsObject):
         self._callback = on_position_changed
         self._mode = "text"
         self._path = QPainterPath()
+        self._shadow_path = QPainterPath()
         self._rect = QRectF(0, 0, 1, 1)
         self._color = QColor(255, 255, 255, 180)
+        self._shadow_color = QColor(0, 0, 0, 108)
+        self._pen = QPen(Qt.PenStyle.NoPen)
         self._shadow = False
         self._outline = False
         self._shadow_offset = 2.0
         self._outline_width = 1.5
         self._pixmap = QPixmap()
         self._opacity = 1.0
+        self._style_key = None
+        self._content_size = QPointF(1.0, 1.0)
+        self._suppress_callback = False
         self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemIsMovable, True)
         self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemIsSelectable, False)
-        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemSendsGeometryChanges, True)
+        # Geometry notifications are only wanted while the user drags, see mousePressEvent.
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemSendsGeometryChanges, False)
+        # Dragging only moves the item, so reuse the rasterised watermark
+        # instead of repainting the antialiased path on every mouse move.
+        self.setCacheMode(QGraphicsItem.CacheMode.DeviceCoordinateCache)
 
     def boundingRect(self) -> QRectF:  # noqa: D401
         if self._mode == "image":
@@ -49,55 +111,42 @@ class DraggableWatermarkItem(QGraphicsObject):
         if self._path.isEmpty():
             return
         painter.save()
-        painter.setRenderHints(
-            QPainter.RenderHint.Antialiasing
-            | QPainter.RenderHint.TextAntialiasing
-            | QPainter.RenderHint.SmoothPixmapTransform
-        )
+        # The text is already an outline, so TextAntialiasing would have no effect.
+        painter.setRenderHints(QPainter.RenderHint.Antialiasing | QPainter.RenderHint.SmoothPixmapTransform)
         if self._shadow:
-            shadow_color = QColor(0, 0, 0, int(self._color.alpha() * 0.6))
             painter.setPen(Qt.PenStyle.NoPen)
-            painter.setBrush(shadow_color)
-            painter.drawPath(self._path.translated(self._shadow_offset, self._shadow_offset))
+            painter.setBrush(self._shadow_color)
+            painter.drawPath(self._shadow_path)
 
-        painter.setPen(Qt.PenStyle.NoPen)
+        # One pass for fill and outline; _pen is NoPen when the outline is off.
+        painter.setPen(self._pen)
         painter.setBrush(self._color)
         painter.drawPath(self._path)
-
-        if self._outline:
-            outline_color = QColor(0, 0, 0, self._color.alpha())
-            pen = QPen(outline_color, self._outline_width, Qt.PenStyle.SolidLine, Qt.PenCapStyle.RoundCap, Qt.PenJoinStyle.RoundJoin)
-            painter.setPen(pen)
-            painter.setBrush(Qt.BrushStyle.NoBrush)
-            painter.drawPath(self._path)
         painter.restore()
 
     def update_settings(self, settings: WatermarkSettings) -> None:
-        if settings.mode == "image":
-            self._update_image_mode(settings)
-        else:
-            self._update_text_mode(settings)
+        key = _style_key(settings)
+        if key != self._style_key:
+            self._style_key = key
+            if settings.mode == "image":
+                self._update_image_mode(settings)
+            else:
+                self._update_text_mode(settings)
+        self.setRotation(-settings.rotation)
+        # Axis-aligned box of the bounding rect rotated about its centre.
+        rect = self.boundingRect()
+        angle = math.radians(settings.rotation)
+        cos_a = abs(math.cos(angle))
+        sin_a = abs(math.sin(angle))
+        width = rect.width() * cos_a + rect.height() * sin_a
+        height = rect.width() * sin_a + rect.height() * cos_a
+        self._content_size = QPointF(max(1.0, width), max(1.0, height))
 
     def _update_text_mode(self, settings: WatermarkSettings) -> None:
-        font = QFont(settings.font_family or "Arial", pointSize=settings.font_size)
-        font.setBold(settings.bold)
-        font.setItalic(settings.italic)
-
-        metrics = QFontMetrics(font)
-        lines = settings.text.splitlines() or [""]
-        path = QPainterPath()
-        y = 0
-        for line in lines:
-            content = line or " "
-            path.addText(0, y + metrics.ascent(), font, content)
-            y += metrics.lineSpacing()
-        if path.isEmpty():
-            path.addText(0, metrics.ascent(), font, " ")
-
-        rect = path.boundingRect()
-        if rect.x() or rect.y():
-            path.translate(-rect.x(), -rect.y())
-            rect = path.boundingRect()
+        font = get_font(settings.font_family, settings.font_size, settings.bold, settings.italic)
+        key = (settings.text, settings.font_family, settings.font_size, settings.bold, settings.italic)
+        path = get_text_path(*key)
+        rect = get_text_rect(*key)
 
         self.prepareGeometryChange()
         self._mode = "text"
@@ -111,28 +160,29 @@ class DraggableWatermarkItem(QGraphicsObject):
         self._outline = settings.outline
         self._shadow_offset = max(2.0, font.pointSizeF() * 0.08)
         self._outline_width = max(1.5, font.pointSizeF() * 0.1)
+        self._shadow_path = path.translated(self._shadow_offset, self._shadow_offset) if self._shadow else QPainterPath()
+        self._shadow_color = QColor(0, 0, 0, int(alpha * 0.6))
+        if self._outline:
+            outline_color = QColor(0, 0, 0, alpha)
+            self._pen = QPen(outline_color, self._outline_width, Qt.PenStyle.SolidLine, Qt.PenCapStyle.RoundCap, Qt.PenJoinStyle.RoundJoin)
+        else:
+            self._pen = QPen(Qt.PenStyle.NoPen)
         self._opacity = 1.0
         self.setTransformOriginPoint(self._rect.center())
-        self.setRotation(-settings.rotation)
         self.update()
 
     def _update_image_mode(self, settings: WatermarkSettings) -> None:
         pixmap = QPixmap()
-        if settings.image_path:
-            pm = QPixmap(settings.image_path)
-            if not pm.isNull():
-                scale_percent = max(1, settings.image_scale)
-                scale_factor = scale_percent / 100.0
-                new_width = max(1, int(pm.width() * scale_factor))
-                new_height = max(1, int(pm.height() * scale_factor))
-                pm = pm.scaled(new_width, new_height, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
-                pixmap = pm
+        mtime_ns = _mtime_ns(settings.image_path)
+        if mtime_ns is not None:
+            pixmap = _scaled_watermark_pixmap(settings.image_path, mtime_ns, max(1, settings.image_scale))
 
         rect = QRectF(0, 0, max(1, pixmap.width()), max(1, pixmap.height()))
 
         self.prepareGeometryChange()
         self._mode = "image"
         self._path = QPainterPath()
+        self._shadow_path = QPainterPath()
         self._pixmap = pixmap
         self._rect = rect
         self._shadow = False
@@ -141,15 +191,34 @@ class DraggableWatermarkItem(QGraphicsObject):
         self._outline_width = 0.0
         self._opacity = max(0.0, min(1.0, settings.opacity / 100.0))
         self.setTransformOriginPoint(self._rect.center())
-        self.setRotation(-settings.rotation)
         self.update()
 
     def content_size(self) -> QPointF:
-        rect = self.mapRectToParent(self.boundingRect())
-        return QPointF(max(1.0, rect.width()), max(1.0, rect.height()))
+        """Size of the rotated watermark, refreshed by update_settings."""
+        return QPointF(self._content_size)
+
+    def set_pos_silently(self, pos: QPointF) -> None:
+        """Move the item without reporting it as a user drag."""
+        self._suppress_callback = True
+        try:
+            self.setPos(pos)
+        finally:
+            self._suppress_callback = False
+
+    def mousePressEvent(self, event) -> None:
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemSendsGeometryChanges, True)
+        super().mousePressEvent(event)
+
+    def mouseReleaseEvent(self, event) -> None:
+        super().mouseReleaseEvent(event)
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemSendsGeometryChanges, False)
 
     def itemChange(self, change, value):  # noqa: D401
-        if change == QGraphicsItem.GraphicsItemChange.ItemPositionHasChanged and self._callback:
+        if (
+            change == QGraphicsItem.GraphicsItemChange.ItemPositionHasChanged
+            and self._callback
+            and not self._suppress_callback
+        ):
             self._callback(self.pos())
         return super().itemChange(change, value)
 
@@ -166,32 +235,57 @@ class ImagePreview(QGraphicsView):
             | QPainter.RenderHint.TextAntialiasing
         )
         self.setBackgroundBrush(QBrush(QColor("#202020")))
+        # The scene is one image and one watermark, so repainting everything is
+        # cheaper than tracking the dirty regions of a dragged, rotated item.
+        self.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.FullViewportUpdate)
+        # The watermark's paint() saves and restores the painter itself.
+        self.setOptimizationFlag(QGraphicsView.OptimizationFlag.DontSavePainterState, True)
         self._pixmap_item = None
         self._image_size = None
         self._watermark_item = DraggableWatermarkItem(self._on_position_changed)
+        self._watermark_item.setZValue(1)
         self._on_ratio_changed = on_position_ratio_changed
         self._current_settings: WatermarkSettings | None = None
+        self._apply_timer = QTimer(self)
+        self._apply_timer.setSingleShot(True)
+        self._apply_timer.setInterval(16)
+        self._apply_timer.timeout.connect(self._apply_current_settings)
 
     def clear(self) -> None:
-        self.scene().clear()
+        # The watermark item is kept across images so its cached rendering survives.
+        scene = self.scene()
+        if self._pixmap_item is not None:
+            scene.removeItem(self._pixmap_item)
+        if self._watermark_item.scene() is scene:
+            scene.removeItem(self._watermark_item)
         self._pixmap_item = None
         self._image_size = None
-        self._watermark_item = DraggableWatermarkItem(self._on_position_changed)
 
-    def set_image(self, image) -> None:
+    def set_image(self, image, source_size=None) -> None:
+        """Show ``image``, stretched to ``source_size`` so scene units stay source pixels."""
         self.clear()
         pixmap = QPixmap.fromImage(image)
         self._pixmap_item = self.scene().addPixmap(pixmap)
-        self._image_size = image.size()
-        self.scene().addItem(self._watermark_item)
-        self._watermark_item.setZValue(1)
-        if self._current_settings:
-            self._watermark_item.update_settings(self._current_settings)
-            self._set_position_ratio(self._current_settings.position_ratio)
+        self._image_size = source_size if source_size and source_size.isValid() else image.size()
+        if image.width() and self._image_size.width() != image.width():
+            self._pixmap_item.setTransformationMode(Qt.TransformationMode.SmoothTransformation)
+            self._pixmap_item.setScale(self._image_size.width() / image.width())
+        if self._watermark_item.scene() is None:
+            self.scene().addItem(self._watermark_item)
+        self._apply_current_settings()
         self._center_view()
 
     def apply_settings(self, settings: WatermarkSettings) -> None:
+        """Show ``settings`` on the next frame; calls in between coalesce."""
         self._current_settings = settings
+        if not self._apply_timer.isActive():
+            self._apply_timer.start()
+
+    def _apply_current_settings(self) -> None:
+        self._apply_timer.stop()
+        settings = self._current_settings
+        if not settings:
+            return
         self._watermark_item.update_settings(settings)
         self._set_position_ratio(settings.position_ratio)
 
@@ -210,7 +304,7 @@ class ImagePreview(QGraphicsView):
         size = self._watermark_item.content_size()
         x = ratio.x() * max(1, self._image_size.width() - size.x())
         y = ratio.y() * max(1, self._image_size.height() - size.y())
-        self._watermark_item.setPos(x, y)
+        self._watermark_item.set_pos_silently(QPointF(x, y))
 
     def _on_position_changed(self, pos) -> None:
         if not self._image_size:
@@ -218,11 +312,12 @@ class ImagePreview(QGraphicsView):
         size = self._watermark_item.content_size()
         width = max(1, self._image_size.width() - size.x())
         height = max(1, self._image_size.height() - size.y())
-        ratio = QPointF(pos.x() / width, pos.y() / height)
-        ratio.setX(min(max(ratio.x(), 0.0), 1.0))
-        ratio.setY(min(max(ratio.y(), 0.0), 1.0))
+        rx = pos.x() / width
+        ry = pos.y() / height
+        rx = 0.0 if rx < 0.0 else (1.0 if rx > 1.0 else rx)
+        ry = 0.0 if ry < 0.0 else (1.0 if ry > 1.0 else ry)
         if self._on_ratio_changed:
-            self._on_ratio_changed(ratio)
+            self._on_ratio_changed(QPointF(rx, ry))
 
     def set_zoom_fit(self) -> None:
         self._center_view()